@@ -1,8 +1,23 @@
+import atexit
+import hashlib
+import logging
 import os
-from functools import wraps
-from flask import Flask, render_template, jsonify, request, Response
-from sqlalchemy import create_engine, text
-from sqlalchemy.exc import IntegrityError
+import queue
+import tempfile
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import wraps, lru_cache
+from logging.handlers import QueueHandler, QueueListener
+from hmac import compare_digest
+from flask import Flask, render_template, jsonify, request, Response, g
+from flask.logging import default_handler
+from flask.json.provider import JSONProvider
+from flask_caching import Cache
+from jinja2 import FileSystemBytecodeCache
+import orjson
+from sqlalchemy import create_engine, text, RowMapping
+from sqlalchemy.exc import IntegrityError, OperationalError
 from dotenv import load_dotenv
 
 # ===============================
@@ -20,13 +35,39 @@ DATABASE_URL = os.getenv("DATABASE_URL_LOCAL") or os.getenv("DATABASE_URL")
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# psycopg prepara no servidor as queries repetidas após N execuções;
+# DB_PREPARE_THRESHOLD=none desliga (ex.: PgBouncer em modo transaction)
+_prepare_env = str(os.getenv('DB_PREPARE_THRESHOLD') or '3').strip().lower()
+DB_PREPARE_THRESHOLD = None if _prepare_env in ('none', 'off') else int(_prepare_env)
+
+# Pool de conexões por processo (cada worker do gunicorn tem o seu): uma conexão
+# por thread do worker basta, já que cada thread usa no máximo uma por vez.
+# Mínimo 2: run_migrations segura a conexão do advisory lock e a dos ALTERs juntas
+DB_POOL_SIZE = max(2, int(os.getenv('DB_POOL_SIZE') or os.getenv('GUNICORN_THREADS') or 8))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW') or 0)
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT') or 5)
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE') or 1800)
+# Parâmetros de sessão enviados no handshake (sem SET extra por conexão);
+# JIT só atrasa as queries curtas daqui. Vazio desliga (PgBouncer não aceita "options")
+DB_SESSION_OPTIONS = os.getenv('DB_SESSION_OPTIONS', '-c jit=off').strip()
+
 # Cria engine de conexão (se houver DATABASE_URL)
+_connect_args = {"connect_timeout": 3, "prepare_threshold": DB_PREPARE_THRESHOLD}
+if DB_SESSION_OPTIONS:
+    _connect_args["options"] = DB_SESSION_OPTIONS
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"connect_timeout": 3},
+    connect_args=_connect_args,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
     pool_pre_ping=True
 ) if DATABASE_URL else None
 
+# Leituras puras em AUTOCOMMIT: dispensa BEGIN/ROLLBACK em torno de um SELECT
+read_engine = engine.execution_options(isolation_level="AUTOCOMMIT") if engine else None
+
 # Inicialização do aplicativo Flask com caminhos explícitos
 app = Flask(
     __name__,
@@ -34,7 +75,91 @@ app = Flask(
     template_folder=os.path.join(BASE_DIR, 'templates')
 )
 
-print("[INFO] DATABASE_URL:", DATABASE_URL)
+# ===============================
+# Logging
+# ===============================
+
+# a requisição só enfileira o registro; a escrita no stderr fica numa thread própria
+_log_queue = queue.SimpleQueue()
+_log_stream = logging.StreamHandler()
+_log_stream.setFormatter(logging.Formatter("[%(levelname)s] %(message)s"))
+_log_listener = QueueListener(_log_queue, _log_stream)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+app.logger.removeHandler(default_handler)
+app.logger.addHandler(QueueHandler(_log_queue))
+app.logger.setLevel(logging.INFO)
+
+# ===============================
+# JSON via orjson (jsonify e request.get_json)
+# ===============================
+
+# converte tipos que o orjson não serializa nativamente (Decimal como no Flask)
+def json_default(obj):
+    if isinstance(obj, RowMapping):
+        return dict(obj)
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError
+
+class OrjsonProvider(JSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=json_default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    # bytes direto para a resposta, sem passar por str
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=json_default), mimetype='application/json')
+
+app.json = OrjsonProvider(app)
+
+# Templates compilados uma vez e reaproveitados entre reinícios do processo
+JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'maketa_jinja_cache')
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+
+# Cache de respostas da API: Redis compartilhado entre workers se REDIS_URL
+# estiver definido. Sem Redis, memória do próprio processo só com um worker:
+# com vários, uma escrita limparia apenas o cache do worker que a atendeu e os
+# outros serviriam a versão antiga; nesse caso o cache fica desligado (NullCache).
+# WEB_CONCURRENCY é exportado pelo gunicorn.conf.py com o número real de workers.
+REDIS_URL = os.getenv('REDIS_URL')
+WEB_WORKERS = int(os.getenv('WEB_CONCURRENCY') or 1)
+if REDIS_URL:
+    CACHE_TYPE = 'RedisCache'
+elif WEB_WORKERS > 1:
+    CACHE_TYPE = 'NullCache'
+else:
+    CACHE_TYPE = 'SimpleCache'
+LIST_CACHE_KEY = 'maquetes_list'
+LIST_CACHE_TIMEOUT = 30
+MAQUETE_CACHE_TIMEOUT = 300
+cache = Cache(app, config={
+    'CACHE_TYPE': CACHE_TYPE,
+    'CACHE_REDIS_URL': REDIS_URL,
+    'CACHE_KEY_PREFIX': 'maketa:',
+    'CACHE_DEFAULT_TIMEOUT': LIST_CACHE_TIMEOUT,
+    # delete_many segue adiante mesmo se uma das chaves não estiver no cache
+    'CACHE_IGNORE_ERRORS': True,
+})
+
+# chave de cache de uma maquete individual
+def maquete_cache_key(mid):
+    return f'maquete:{mid}'
+
+# invalida entradas após escrita; falha do cache não deve derrubar a requisição
+def invalidate_cache(*keys):
+    try:
+        cache.delete_many(*keys)
+    except Exception as e:
+        app.logger.warning("Falha ao invalidar cache: %s", e)
+
+app.logger.info("DATABASE_URL: %s", DATABASE_URL)
+app.logger.info("Cache: %s", CACHE_TYPE)
 
 # ===============================
 # SEGURANÇA - Autenticação básica para rotas admin
@@ -44,8 +169,12 @@ print("[INFO] DATABASE_URL:", DATABASE_URL)
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', os.getenv('ADMIN_USER', 'admin'))
 ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', os.getenv('ADMIN_PASS', 'change_this_password'))
 
+# resultado memoizado por par (usuário, senha); comparação em tempo constante
+@lru_cache(maxsize=1024)
 def check_auth(username, password):
-    return username == ADMIN_USERNAME and password == ADMIN_PASSWORD
+    # '&' (e não 'and') compara sempre os dois campos, sem curto-circuito
+    return (compare_digest((username or '').encode(), ADMIN_USERNAME.encode())
+            & compare_digest((password or '').encode(), ADMIN_PASSWORD.encode()))
 
 # responde 401 com cabeçalho WWW-Authenticate
 def authenticate():
@@ -58,9 +187,13 @@ def authenticate():
 def requires_auth(f):
     @wraps(f)
     def decorated(*args, **kwargs):
+        # já autenticado neste request (decorators aninhados)
+        if g.get('_auth_ok'):
+            return f(*args, **kwargs)
         auth = request.authorization
         if not auth or not check_auth(auth.username, auth.password):
             return authenticate()
+        g._auth_ok = True
         return f(*args, **kwargs)
     return decorated
 
@@ -68,236 +201,479 @@ def requires_auth(f):
 # Rotas de páginas
 # ===============================
 
-# renderizar página inicial
+# configuração do Cloudinary (upload direto pelo navegador), lida uma vez
+CLOUDINARY_CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME')
+CLOUDINARY_UPLOAD_PRESET = os.getenv('CLOUDINARY_UPLOAD_PRESET')
+
+# página inicial não usa variáveis de template: lida uma vez e servida como bytes
+with open(os.path.join(BASE_DIR, 'templates', 'pages', 'index.html'), 'rb') as fh:
+    INDEX_BYTES = fh.read()
+
+# servir página inicial pré-carregada
 @app.route('/')
 def index():
-    return render_template('pages/index.html')
+    resp = Response(INDEX_BYTES, mimetype='text/html')
+    resp.headers['Cache-Control'] = 'public, max-age=3600'
+    return resp
 
 # renderizar painel admin protegido
 @app.route('/admin')
 @requires_auth
 def admin():
-    cloud_name = os.getenv('CLOUDINARY_CLOUD_NAME')
-    upload_preset = os.getenv('CLOUDINARY_UPLOAD_PRESET')
-    return render_template('pages/dashboard.html', cloudinary_cloud_name=cloud_name, cloudinary_upload_preset=upload_preset)
+    return render_template('pages/dashboard.html', cloudinary_cloud_name=CLOUDINARY_CLOUD_NAME, cloudinary_upload_preset=CLOUDINARY_UPLOAD_PRESET)
 
 # Página de edição
 @app.route('/admin/maquetes/<int:mid>/editar')
 @requires_auth
 def editar_maquete(mid: int):
-    cloud_name = os.getenv('CLOUDINARY_CLOUD_NAME')
-    upload_preset = os.getenv('CLOUDINARY_UPLOAD_PRESET')
-    return render_template('pages/editar_maquete.html', maquete_id=mid, cloudinary_cloud_name=cloud_name, cloudinary_upload_preset=upload_preset)
+    return render_template('pages/editar_maquete.html', maquete_id=mid, cloudinary_cloud_name=CLOUDINARY_CLOUD_NAME, cloudinary_upload_preset=CLOUDINARY_UPLOAD_PRESET)
 
 # ===============================
 # Healthcheck
 # ===============================
 
+SQL_PING = text("SELECT 1")
+
 def ensure_db():
     if not engine:
         return False, "missing_config"
     try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        with read_engine.connect() as conn:
+            conn.execute(SQL_PING)
         return True, None
     except Exception as e:
-        print("[ERROR] DB connection:", e)
+        app.logger.error("DB connection: %s", e)
         return False, str(e)
 
+# erros fixos serializados uma vez; devolvidos direto como (corpo, status, headers)
+def _error_body(status, **payload):
+    return orjson.dumps(payload), status, {'Content-Type': 'application/json'}
+
+ERR_NOT_FOUND = _error_body(404, error="not_found")
+ERR_NO_FIELDS = _error_body(400, error="no_fields")
+ERR_INVALID_JSON = _error_body(400, error="invalid_json", detail="body must be a JSON object")
+
+# resposta padrão quando o banco está inacessível; a validade da conexão
+# fica a cargo do pool_pre_ping, sem um SELECT 1 extra por requisição
+def db_unavailable(detail):
+    return jsonify({"error": "db_unavailable", "detail": detail}), 503
+
+# resposta "tudo ok" pronta; o banco só é sondado de novo após HEALTH_TTL_MS
+HEALTH_TTL_MS = 1000
+HEALTH_OK_BODY = b'{"app":"ok","db":"ok"}'
+_health_ok_at = None
+
 # verificar status da app e conexão com o banco 
 @app.route('/health')
 def health():
-    status = {"app": "ok"}
+    global _health_ok_at
+    now = time.monotonic()
+    if _health_ok_at is not None and (now - _health_ok_at) * 1000 < HEALTH_TTL_MS:
+        return Response(HEALTH_OK_BODY, mimetype='application/json')
     ok, err = ensure_db()
     if ok:
-        status["db"] = "ok"
-    else:
-        status["db"] = "error" if engine else "missing_config"
-        if err:
-            status["error"] = err
+        _health_ok_at = now
+        return Response(HEALTH_OK_BODY, mimetype='application/json')
+    _health_ok_at = None
+    status = {"app": "ok", "db": "error" if engine else "missing_config"}
+    if err:
+        status["error"] = err
     return jsonify(status)
 
 # ===============================
 # Migração leve: coluna 'info' em 'maquetes'
 # ===============================
 
+# psycopg 3 descarta os NOTICE do servidor por padrão: os RAISE NOTICE dos blocos
+# DO das migrações são repassados ao log da aplicação; os avisos "..., skipping"
+# dos IF [NOT] EXISTS ficam de fora (não vêm de um RAISE)
+def log_db_notice(diag):
+    if (diag.context or '').rstrip().endswith('at RAISE'):
+        app.logger.info("Migração leve: %s", diag.message_primary)
+
+# transação das migrações com o repasse de NOTICE ligado só enquanto ela dura
+# (a conexão volta ao pool sem o handler)
+@contextmanager
+def migration_connection():
+    with engine.begin() as conn:
+        raw = conn.connection.dbapi_connection
+        raw.add_notice_handler(log_db_notice)
+        try:
+            yield conn
+        finally:
+            raw.remove_notice_handler(log_db_notice)
+
 def ensure_schema_info():
-    ok, err = ensure_db()
-    if not ok:
-        print("[WARN] DB indisponível; migração 'info' não executada:", err)
-        return
     try:
-        with engine.begin() as conn:
-            # Garante existência da coluna
-            conn.execute(text("ALTER TABLE maquetes ADD COLUMN IF NOT EXISTS info TEXT"))
-            # Verifica tipo atual da coluna
-            col = conn.execute(text(
+        # Um único round-trip: checagem de tipo e ALTER condicional rodam no servidor
+        with migration_connection() as conn:
+            conn.execute(text(
                 """
-                SELECT data_type, udt_name
-                FROM information_schema.columns
-                WHERE table_name = 'maquetes' AND column_name = 'info'
-                """
-            )).mappings().first()
-            if col:
-                dt = (col.get('data_type') or '').lower()
-                udt = (col.get('udt_name') or '').lower()
-                # Se for ARRAY (ex.: _text), converte para TEXT preservando conteúdo
-                if dt == 'array' or udt == '_text':
-                    conn.execute(text(
-                        """
+                DO $$
+                DECLARE
+                    col_type text;
+                    col_category char;
+                BEGIN
+                    -- Garante existência da coluna
+                    ALTER TABLE maquetes ADD COLUMN IF NOT EXISTS info TEXT;
+                    SELECT t.typname, t.typcategory INTO col_type, col_category
+                    FROM pg_attribute a
+                    JOIN pg_type t ON t.oid = a.atttypid
+                    WHERE a.attrelid = 'maquetes'::regclass
+                      AND a.attname = 'info'
+                      AND NOT a.attisdropped;
+                    IF col_category = 'A' THEN
+                        -- ARRAY (ex.: _text): converte para TEXT preservando conteúdo
                         ALTER TABLE maquetes
                         ALTER COLUMN info TYPE TEXT
-                        USING COALESCE(array_to_string(info, ' '), '')
-                        """
-                    ))
-                    print("[INFO] Coluna 'info' convertida de TEXT[] para TEXT")
-                elif dt != 'text':
-                    # Qualquer outro tipo inesperado: força conversão para TEXT
-                    conn.execute(text(
-                        """
+                        USING COALESCE(array_to_string(info, ' '), '');
+                        RAISE NOTICE 'coluna info convertida de % para TEXT', col_type;
+                    ELSIF col_type <> 'text' THEN
+                        -- Qualquer outro tipo inesperado: força conversão para TEXT
                         ALTER TABLE maquetes
                         ALTER COLUMN info TYPE TEXT
-                        USING COALESCE(info::text, '')
-                        """
-                    ))
-                    print("[INFO] Coluna 'info' ajustada para TEXT")
-        print("[INFO] Migração leve: coluna 'info' ok")
+                        USING COALESCE(info::text, '');
+                        RAISE NOTICE 'coluna info ajustada de % para TEXT', col_type;
+                    END IF;
+                END $$
+                """
+            ))
+        app.logger.info("Migração leve: coluna 'info' ok")
+        return True
     except Exception as e:
-        print("[ERROR] Migração leve 'info':", e)
+        app.logger.error("Migração leve 'info': %s", e)
+        return False
 
 # Permitir nomes repetidos: remove UNIQUE em maquetes.nome
 def ensure_nome_allows_duplicates():
-    ok, err = ensure_db()
-    if not ok:
-        print("[WARN] DB indisponível; ajuste UNIQUE 'nome' não executado:", err)
-        return
     try:
-        with engine.begin() as conn:
-            # Localiza quaisquer UNIQUE constraints sobre a coluna 'nome'
-            cons = conn.execute(text(
+        # Um único round-trip: localiza e remove as constraints no servidor
+        with migration_connection() as conn:
+            conn.execute(text(
                 """
-                SELECT tc.constraint_name
-                FROM information_schema.table_constraints tc
-                JOIN information_schema.key_column_usage kcu
-                  ON tc.constraint_name = kcu.constraint_name
-                WHERE tc.table_name = 'maquetes'
-                  AND tc.constraint_type = 'UNIQUE'
-                  AND kcu.column_name = 'nome'
+                DO $$
+                DECLARE
+                    r record;
+                BEGIN
+                    -- Localiza quaisquer UNIQUE constraints sobre a coluna 'nome'
+                    FOR r IN
+                        SELECT tc.constraint_name
+                        FROM information_schema.table_constraints tc
+                        JOIN information_schema.key_column_usage kcu
+                          ON tc.constraint_name = kcu.constraint_name
+                        WHERE tc.table_name = 'maquetes'
+                          AND tc.constraint_type = 'UNIQUE'
+                          AND kcu.column_name = 'nome'
+                    LOOP
+                        EXECUTE 'ALTER TABLE maquetes DROP CONSTRAINT ' || quote_ident(r.constraint_name);
+                        RAISE NOTICE 'removido UNIQUE constraint % de maquetes.nome', r.constraint_name;
+                    END LOOP;
+                    -- Também remove índice único se existir com nome padrão
+                    DROP INDEX IF EXISTS maquetes_nome_key;
+                END $$
                 """
-            )).fetchall()
-            for row in cons:
-                name = row[0]
-                conn.execute(text(f'ALTER TABLE maquetes DROP CONSTRAINT "{name}"'))
-                print(f"[INFO] Removido UNIQUE constraint {name} de 'maquetes.nome'")
-            # Também remove índice único se existir com nome padrão
-            conn.execute(text('DROP INDEX IF EXISTS maquetes_nome_key'))
-        print("[INFO] 'maquetes.nome' agora permite duplicados")
+            ))
+        app.logger.info("'maquetes.nome' agora permite duplicados")
+        return True
+    except Exception as e:
+        app.logger.warning("Falha ao ajustar UNIQUE de 'nome': %s", e)
+        return False
+
+# Versão da linha: usada nos ETags das respostas GET
+def ensure_updated_at():
+    try:
+        with migration_connection() as conn:
+            conn.execute(text("ALTER TABLE maquetes ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now()"))
+        app.logger.info("Migração leve: coluna 'updated_at' ok")
+        return True
     except Exception as e:
-        print("[WARN] Falha ao ajustar UNIQUE de 'nome':", e)
+        app.logger.error("Migração leve 'updated_at': %s", e)
+        return False
+
+# Chave fixa do advisory lock que serializa as migrações entre workers
+MIGRATIONS_LOCK_KEY = 0x4D414B45
+
+# SKIP_MIGRATIONS=1: os workers não mexem no schema ao iniciar; as migrações
+# rodam à parte com "flask --app app migrate" (serviço maketa_migrate no compose)
+SKIP_MIGRATIONS = str(os.getenv('SKIP_MIGRATIONS')).strip().lower() in ('1', 'true', 'yes', 'on')
+
+# Schema já no estado final das migrações leves? Só leitura do catálogo (sem lock na
+# tabela): info TEXT, nenhum UNIQUE em nome e coluna updated_at presente
+SQL_SCHEMA_CURRENT = text(
+    """
+    SELECT
+        EXISTS (
+            SELECT 1 FROM pg_attribute a JOIN pg_type t ON t.oid = a.atttypid
+            WHERE a.attrelid = 'maquetes'::regclass AND a.attname = 'info'
+              AND NOT a.attisdropped AND t.typname = 'text'
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM pg_constraint c
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = ANY (c.conkey)
+            WHERE c.conrelid = 'maquetes'::regclass AND c.contype = 'u' AND a.attname = 'nome'
+        )
+        AND to_regclass('maquetes_nome_key') IS NULL
+        AND EXISTS (
+            SELECT 1 FROM pg_attribute
+            WHERE attrelid = 'maquetes'::regclass AND attname = 'updated_at' AND NOT attisdropped
+        )
+    """
+)
+
+# Executa as migrações leves serializadas pelo advisory lock: com N workers, quem
+# chega depois espera o primeiro terminar e só confere o catálogo; os ALTERs
+# (ACCESS EXCLUSIVE em maquetes) rodam apenas se o schema ainda não estiver em dia.
+# Nenhum worker atende antes do schema estar pronto. Devolve True se tudo ok.
+def run_migrations():
+    ok, err = ensure_db()
+    if not ok:
+        app.logger.warning("DB indisponível; migrações leves não executadas: %s", err)
+        return False
+    try:
+        # AUTOCOMMIT: o lock é de sessão, sem transação aberta enquanto espera
+        with read_engine.connect() as conn:
+            conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATIONS_LOCK_KEY})
+            try:
+                if conn.execute(SQL_SCHEMA_CURRENT).scalar():
+                    app.logger.info("Migrações leves: schema já atualizado")
+                    return True
+                results = [ensure_schema_info(), ensure_nome_allows_duplicates(), ensure_updated_at()]
+            finally:
+                conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATIONS_LOCK_KEY})
+        return all(results)
+    except Exception as e:
+        app.logger.error("Migrações leves: %s", e)
+        return False
+
+# entrada única para deploy: sai com erro se alguma migração falhar
+@app.cli.command('migrate', help="Executa as migrações leves do schema e sai.")
+def migrate_command():
+    if not run_migrations():
+        raise SystemExit(1)
 
 # Executar migrações leves ao iniciar
-ensure_schema_info()
-ensure_nome_allows_duplicates()
+if SKIP_MIGRATIONS:
+    app.logger.info("SKIP_MIGRATIONS definido; migrações leves não executadas")
+else:
+    run_migrations()
 
 # ===============================
 # API Maquetes
 # ===============================
 
-# listar maquetes com campos básicos
+# SQL pré-compilado uma vez na importação (evita reconstruir o TextClause a cada requisição)
+# a listagem já sai do Postgres como um único texto JSON (row_to_json + string_agg),
+# paginada por id (keyset): junto vêm a quantidade e o menor id da página
+_LIST_SQL = """
+    SELECT COALESCE('[' || string_agg(row_to_json(t)::text, ',' ORDER BY t.id DESC) || ']', '[]'), count(*), min(t.id)
+    FROM (
+        SELECT id, nome, escala, proprietario, imagem_principal_url, imagem_principal_public_id FROM maquetes
+        {where}
+        ORDER BY id DESC
+        LIMIT :limit
+    ) t
+"""
+SQL_LIST = text(_LIST_SQL.format(where=""))
+SQL_LIST_AFTER = text(_LIST_SQL.format(where="WHERE id < :after"))
+# colunas devolvidas pelo GET e pelos RETURNING de INSERT/UPDATE
+MAQUETE_COLUMNS = "id, nome, escala, peso, proprietario, projeto, info, imagem_principal_url, imagem_principal_public_id, largura_cm, altura_cm, comprimento_cm, cidade, estado, ano, mes, updated_at"
+SQL_GET = text(
+    f"""
+    SELECT {MAQUETE_COLUMNS} FROM maquetes WHERE id=:id
+    """
+)
+SQL_INSERT = text(
+    f"""
+    INSERT INTO maquetes (nome, escala, peso, proprietario, projeto, info, imagem_principal_url, imagem_principal_public_id, cidade, estado, ano, mes, largura_cm, altura_cm, comprimento_cm)
+    VALUES (:nome, :escala, :peso, :proprietario, :projeto, COALESCE(:info, ''), :imagem_principal_url, :imagem_principal_public_id, :cidade, :estado, :ano, :mes, :largura_cm, :altura_cm, :comprimento_cm)
+    RETURNING {MAQUETE_COLUMNS}
+    """
+)
+# UPDATE só com as colunas que de fato mudam, um TextClause por conjunto de campos
+@lru_cache(maxsize=256)
+def update_statement(keys):
+    sets = ", ".join(f"{k} = :{k}" for k in sorted(keys))
+    return text(f"UPDATE maquetes SET {sets}, updated_at = clock_timestamp() WHERE id = :id RETURNING {MAQUETE_COLUMNS}")
+
+SQL_DELETE = text("DELETE FROM maquetes WHERE id=:id")
+
+# ===============================
+# Sanitização dos campos de maquete
+# ===============================
+
+# corpo JSON lido cru e decodificado pelo orjson (sem cópia guardada no request);
+# None quando não é um objeto JSON válido (corpo vazio ou null valem como {})
+def parse_body():
+    raw = request.get_data(cache=False)
+    if not raw:
+        return {}
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return None
+    if data is None:
+        return {}
+    return data if isinstance(data, dict) else None
+
+# texto: trim; vazio -> None
+def _clean_str(v):
+    s = (str(v) if v is not None else '').strip()
+    return s or None
+
+# info: nunca NULL; sempre string (pode ser vazia)
+def _clean_text(v):
+    return (str(v) if v is not None else '').strip()
+
+# URL: remove crases/backticks eventualmente colados (uma passada só)
+_BACKTICK_TBL = str.maketrans('', '', '`')
+
+def _clean_url(v):
+    s = (str(v) if v is not None else '').translate(_BACKTICK_TBL).strip()
+    return s or None
+
+# UF em maiúsculas
+def _clean_uf(v):
+    s = _clean_str(v)
+    return s.upper() if s else None
+
+# número já decodificado do JSON é usado direto; texto é convertido como antes
+# (bool fica de fora: True não vira 1; float em campo inteiro continua inválido)
+def _num(v, cast):
+    if type(v) is int or (type(v) is float and cast is float):
+        return cast(v)
+    s = _clean_str(v)
+    return cast(s) if s else None
+
+def _clean_int(v):
+    return _num(v, int)
+
+def _clean_float(v):
+    return _num(v, float)
+
+# campo aceito pela API -> função de sanitização
+FIELD_PARSERS = {
+    'nome': _clean_str,
+    'escala': _clean_str,
+    'peso': _clean_float,
+    'proprietario': _clean_str,
+    'projeto': _clean_str,
+    'info': _clean_text,
+    'imagem_principal_url': _clean_url,
+    'imagem_principal_public_id': _clean_str,
+    'cidade': _clean_str,
+    'estado': _clean_uf,
+    'ano': _clean_int,
+    'mes': _clean_int,
+    'largura_cm': _clean_int,
+    'altura_cm': _clean_int,
+    'comprimento_cm': _clean_int,
+}
+
+# Validações simples; devolve a mensagem de erro ou None
+def validate_maquete(fields):
+    mes = fields.get('mes')
+    if mes is not None and (mes < 1 or mes > 12):
+        return "mes must be between 1 and 12"
+    ano = fields.get('ano')
+    if ano is not None and (ano < 1900 or ano > 2100):
+        return "ano out of range"
+    estado = fields.get('estado')
+    if estado and (len(estado) != 2 or not estado.isalpha()):
+        return "estado must be two letters (UF)"
+    return None
+
+# só guarda no cache respostas 200 (erros de banco não devem ser reaproveitados)
+def only_ok(rv):
+    status = rv[1] if isinstance(rv, tuple) else getattr(rv, 'status_code', 200)
+    return status == 200
+
+# Banco configurado é decidido uma vez; a API responde 503 antes das views,
+# mas só para quem já passou pela autenticação (anônimo continua recebendo 401
+# e não fica sabendo do estado da configuração)
+app.config['DB_READY'] = engine is not None
+
+@app.before_request
+def require_db():
+    if not app.config['DB_READY'] and request.path.startswith('/api/'):
+        auth = request.authorization
+        if not auth or not check_auth(auth.username, auth.password):
+            return authenticate()
+        return db_unavailable("missing_config")
+
+# ETag forte: hash da versão da linha (item) ou do corpo da página (listagem)
+def version_etag(*parts):
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+# respostas com ETag: o navegador revalida sempre e recebe 304 se nada mudou
+# (vale também para respostas servidas do cache, que não passam pela view)
+@app.after_request
+def conditional_get(resp):
+    if request.method == 'GET' and resp.status_code in (200, 304) and 'ETag' in resp.headers:
+        resp.headers['Cache-Control'] = 'private, no-cache'
+        if resp.status_code == 200:
+            resp.make_conditional(request)
+    return resp
+
+# paginação da listagem: ?after=<id>&limit=<n>; a próxima página é indicada
+# no cabeçalho X-Next-After quando a página atual veio cheia
+LIST_PAGE_SIZE = 50
+LIST_MAX_LIMIT = 200
+
+# listar maquetes com campos básicos (só a primeira página padrão vai para o cache)
 @app.route('/api/maquetes', methods=['GET'])
 @requires_auth
+@cache.cached(timeout=LIST_CACHE_TIMEOUT, key_prefix=LIST_CACHE_KEY, response_filter=only_ok,
+              unless=lambda: bool(request.args))
 def list_maquetes():
-    ok, err = ensure_db()
-    if not ok:
-        return jsonify({"error": "db_unavailable", "detail": err}), 503
     try:
-        with engine.begin() as conn:
-            rows = conn.execute(text(
-                "SELECT id, nome, escala, proprietario, imagem_principal_url, imagem_principal_public_id FROM maquetes ORDER BY id DESC"
-            )).mappings().all()
-        return jsonify([dict(r) for r in rows]), 200
+        after = int(request.args['after']) if request.args.get('after') else None
+        limit = int(request.args.get('limit') or LIST_PAGE_SIZE)
+    except ValueError:
+        return jsonify({"error": "invalid_input", "detail": "after and limit must be integers"}), 400
+    limit = max(1, min(limit, LIST_MAX_LIMIT))
+    try:
+        with read_engine.connect() as conn:
+            if after is None:
+                body, count, last_id = conn.execute(SQL_LIST, {"limit": limit}).one()
+            else:
+                body, count, last_id = conn.execute(SQL_LIST_AFTER, {"after": after, "limit": limit}).one()
+        # ETag da própria página (uma consulta só, O(limit)); If-None-Match igual
+        # vira 304 no conditional_get, sem reenviar o corpo
+        etag = version_etag(body, limit)
+        resp = Response(body, mimetype='application/json')
+        resp.set_etag(etag)
+        if count == limit:
+            resp.headers['X-Next-After'] = str(last_id)
+        return resp
+    except OperationalError as e:
+        app.logger.error("list_maquetes (DB): %s", e)
+        return db_unavailable(str(e))
     except Exception as e:
-        print("[ERROR] list_maquetes:", e)
+        app.logger.exception("list_maquetes")
         return jsonify({"error": "query_error", "detail": str(e)}), 500
 
 # criar uma nova maquete    
 @app.route('/api/maquetes', methods=['POST'])
 @requires_auth
 def create_maquete():
-    ok, err = ensure_db()
-    if not ok:
-        return jsonify({"error": "db_unavailable", "detail": err}), 503
-    data = request.get_json(force=True) or {}
+    data = parse_body()
+    if data is None:
+        return ERR_INVALID_JSON
     try:
-        # Sanitize inputs: trim strings and convert empty strings to None
-        nome = (data.get("nome") or "").strip()
-        escala = (data.get("escala") or "").strip()
-        peso_str = (str(data.get("peso")) if data.get("peso") is not None else '').strip()
-        proprietario = (data.get("proprietario") or "").strip()
-        projeto = (data.get("projeto") or "").strip()
-        imagem_principal_url = (data.get("imagem_principal_url") or "").strip()
-        # remover crases/backticks eventualmente colados
-        imagem_principal_url = imagem_principal_url.strip('`').replace('`', '')
-        imagem_principal_public_id = (data.get("imagem_principal_public_id") or "").strip()
-        # Novos campos
-        cidade = (data.get("cidade") or "").strip()
-        estado = (data.get("estado") or "").strip().upper()
-        ano_str = (str(data.get("ano")) if data.get("ano") is not None else '').strip()
-        mes_str = (str(data.get("mes")) if data.get("mes") is not None else '').strip()
-        largura_str = (str(data.get("largura_cm")) if data.get("largura_cm") is not None else '').strip()
-        altura_str = (str(data.get("altura_cm")) if data.get("altura_cm") is not None else '').strip()
-        comprimento_str = (str(data.get("comprimento_cm")) if data.get("comprimento_cm") is not None else '').strip()
-        
-        if not nome:
+        fields = {k: parse(data.get(k)) for k, parse in FIELD_PARSERS.items()}
+        if not fields['nome']:
             return jsonify({"error": "invalid_input", "detail": "nome is required"}), 400
-
-        # Convert strings to numeric types where applicable
-        peso = float(peso_str) if peso_str else None
-        ano = int(ano_str) if ano_str else None
-        mes = int(mes_str) if mes_str else None
-        largura_cm = int(largura_str) if largura_str else None
-        altura_cm = int(altura_str) if altura_str else None
-        comprimento_cm = int(comprimento_str) if comprimento_str else None
-
-        # Validações simples
-        if mes is not None and (mes < 1 or mes > 12):
-            return jsonify({"error": "invalid_input", "detail": "mes must be between 1 and 12"}), 400
-        if ano is not None and (ano < 1900 or ano > 2100):
-            return jsonify({"error": "invalid_input", "detail": "ano out of range"}), 400
-        for val, name in [(largura_cm, 'largura_cm'), (altura_cm, 'altura_cm'), (comprimento_cm, 'comprimento_cm')]:
-            if isinstance(val, str):
-                return jsonify({"error": "invalid_input", "detail": f"{name} must be integer"}), 400
-        if estado:
-            if len(estado) != 2 or not estado.isalpha():
-                return jsonify({"error": "invalid_input", "detail": "estado must be two letters (UF)"}), 400
+        error = validate_maquete(fields)
+        if error:
+            return jsonify({"error": "invalid_input", "detail": error}), 400
 
         with engine.begin() as conn:
-            row = conn.execute(text(
-                """
-                INSERT INTO maquetes (nome, escala, peso, proprietario, projeto, info, imagem_principal_url, imagem_principal_public_id, cidade, estado, ano, mes, largura_cm, altura_cm, comprimento_cm)
-                VALUES (:nome, :escala, :peso, :proprietario, :projeto, COALESCE(:info, ''), :imagem_principal_url, :imagem_principal_public_id, :cidade, :estado, :ano, :mes, :largura_cm, :altura_cm, :comprimento_cm)
-                RETURNING id
-            """), {
-                "nome": nome,
-                "escala": escala or None,
-                "peso": peso,
-                "proprietario": proprietario or None,
-                "projeto": projeto or None,
-                "info": (data.get("info") or "").strip(),
-                "imagem_principal_url": imagem_principal_url or None,
-                "imagem_principal_public_id": imagem_principal_public_id or None,
-                "cidade": cidade or None,
-                "estado": estado or None,
-                "ano": ano,
-                "mes": mes,
-                "largura_cm": largura_cm,
-                "altura_cm": altura_cm,
-                "comprimento_cm": comprimento_cm,
-            }).first()
-            new_id = row.id
-        return jsonify({"ok": True, "id": new_id}), 201
+            row = conn.execute(SQL_INSERT, fields).mappings().one()
+        invalidate_cache(LIST_CACHE_KEY)
+        # devolve a linha completa: o cliente não precisa de um GET em seguida
+        return jsonify({"ok": True, **row}), 201
     except IntegrityError as e:
-        print("[ERROR] create_maquete IntegrityError:", e)
+        app.logger.warning("create_maquete IntegrityError: %s", e)
         detail = "Uma maquete com este nome já existe"
         try:
             orig = getattr(e, 'orig', None)
@@ -308,115 +684,82 @@ def create_maquete():
         except Exception:
             pass
         return jsonify({"error": "duplicate_nome", "detail": detail}), 409
+    except OperationalError as e:
+        app.logger.error("create_maquete (DB): %s", e)
+        return db_unavailable(str(e))
     except Exception as e:
-        print("[ERROR] create_maquete:", e)
+        app.logger.exception("create_maquete")
         return jsonify({"error": "insert_error", "detail": str(e)}), 500
 
 # excluir maquete pelo id   
 @app.route('/api/maquetes/<int:mid>', methods=['DELETE'])
 @requires_auth
 def delete_maquete(mid: int):
-    ok, err = ensure_db()
-    if not ok:
-        return jsonify({"error": "db_unavailable", "detail": err}), 503
     try:
         with engine.begin() as conn:
-            conn.execute(text("DELETE FROM maquetes WHERE id=:id"), {"id": mid})
+            conn.execute(SQL_DELETE, {"id": mid})
+        invalidate_cache(LIST_CACHE_KEY, maquete_cache_key(mid))
         return '', 204
+    except OperationalError as e:
+        app.logger.error("delete_maquete (DB): %s", e)
+        return db_unavailable(str(e))
     except Exception as e:
-        print("[ERROR] delete_maquete:", e)
+        app.logger.exception("delete_maquete")
         return jsonify({"error": "delete_error", "detail": str(e)}), 500
 
 # obter maquete por id
 @app.route('/api/maquetes/<int:mid>', methods=['GET'])
 @requires_auth
+@cache.cached(timeout=MAQUETE_CACHE_TIMEOUT, make_cache_key=maquete_cache_key, response_filter=only_ok)
 def get_maquete(mid: int):
-    ok, err = ensure_db()
-    if not ok:
-        return jsonify({"error": "db_unavailable", "detail": err}), 503
     try:
-        with engine.begin() as conn:
-            row = conn.execute(text(
-            """
-            SELECT id, nome, escala, peso, proprietario, projeto, info, imagem_principal_url, imagem_principal_public_id, largura_cm, altura_cm, comprimento_cm, cidade, estado, ano, mes FROM maquetes WHERE id=:id
-            """
-        ), {"id": mid}).mappings().first()
+        with read_engine.connect() as conn:
+            row = conn.execute(SQL_GET, {"id": mid}).mappings().first()
         if not row:
-            return jsonify({"error": "not_found"}), 404
-        return jsonify(dict(row)), 200
+            return ERR_NOT_FOUND
+        resp = jsonify(row)
+        resp.set_etag(version_etag(mid, row['updated_at']))
+        return resp
+    except OperationalError as e:
+        app.logger.error("get_maquete (DB): %s", e)
+        return db_unavailable(str(e))
     except Exception as e:
-        print("[ERROR] get_maquete:", e)
+        app.logger.exception("get_maquete")
         return jsonify({"error": "query_error", "detail": str(e)}), 500
 
 # atualizar maquete por id
 @app.route('/api/maquetes/<int:mid>', methods=['PUT'])
 @requires_auth
 def update_maquete(mid: int):
-    ok, err = ensure_db()
-    if not ok:
-        return jsonify({"error": "db_unavailable", "detail": err}), 503
-    data = request.get_json(force=True) or {}
-    allowed = ['nome', 'escala', 'peso', 'proprietario', 'projeto', 'info', 'imagem_principal_url', 'imagem_principal_public_id', 'cidade', 'estado', 'ano', 'mes', 'largura_cm', 'altura_cm', 'comprimento_cm']
-    fields = {k: data[k] for k in data.keys() if k in allowed}
+    data = parse_body()
+    if data is None:
+        return ERR_INVALID_JSON
+    # chaves aceitas = as de FIELD_PARSERS (lookup em dict, sem lista por requisição)
+    fields = {k: data[k] for k in data if k in FIELD_PARSERS}
     if not fields:
-        return jsonify({"error": "no_fields"}), 400
+        return ERR_NO_FIELDS
     try:
-        # Sanitize values: trim strings; empty -> None; convert numeric fields
-        if 'imagem_principal_url' in fields:
-            v = fields['imagem_principal_url']
-            s = (str(v) if v is not None else '').strip().strip('`').replace('`','')
-            fields['imagem_principal_url'] = s or None
-        if 'imagem_principal_public_id' in fields:
-            v = fields['imagem_principal_public_id']
-            s = (str(v) if v is not None else '').strip()
-            fields['imagem_principal_public_id'] = s or None
-        for k in ['nome', 'escala', 'proprietario', 'projeto', 'cidade']:
-            if k in fields:
-                v = fields[k]
-                s = (str(v) if v is not None else '').strip()
-                fields[k] = s or None
-        # info: nunca NULL; sempre string (pode ser vazia)
-        if 'info' in fields:
-            v = fields['info']
-            s = (str(v) if v is not None else '').strip()
-            fields['info'] = s
-        # numeric: peso (float), ano/mes/largura/altura/comprimento (int)
-        if 'peso' in fields:
-            v = fields['peso']
-            s = (str(v) if v is not None else '').strip()
-            fields['peso'] = float(s) if s else None
-        for k in ['ano','mes','largura_cm','altura_cm','comprimento_cm']:
-            if k in fields:
-                v = fields[k]
-                s = (str(v) if v is not None else '').strip()
-                fields[k] = int(s) if s else None
+        fields = {k: FIELD_PARSERS[k](v) for k, v in fields.items()}
+        error = validate_maquete(fields)
+        if error:
+            return jsonify({"error": "invalid_input", "detail": error}), 400
+        # campo vazio (None) mantém o valor atual: fica fora do SET
+        changes = {k: v for k, v in fields.items() if v is not None}
+        if not changes:
+            # nada a gravar: devolve a linha atual sem UPDATE (nem bump de updated_at)
+            with read_engine.connect() as conn:
+                row = conn.execute(SQL_GET, {"id": mid}).mappings().first()
+            if not row:
+                return ERR_NOT_FOUND
+            return jsonify(row), 200
         with engine.begin() as conn:
-            result = conn.execute(text(
-                """
-                UPDATE maquetes
-                SET nome = COALESCE(:nome, nome),
-                    escala = COALESCE(:escala, escala),
-                    peso = COALESCE(:peso, peso),
-                    proprietario = COALESCE(:proprietario, proprietario),
-                    projeto = COALESCE(:projeto, projeto),
-                    info = :info,
-                    imagem_principal_url = COALESCE(:imagem_principal_url, imagem_principal_url),
-                    imagem_principal_public_id = COALESCE(:imagem_principal_public_id, imagem_principal_public_id),
-                    cidade = COALESCE(:cidade, cidade),
-                    estado = COALESCE(:estado, estado),
-                    ano = COALESCE(:ano, ano),
-                    mes = COALESCE(:mes, mes),
-                    largura_cm = COALESCE(:largura_cm, largura_cm),
-                    altura_cm = COALESCE(:altura_cm, altura_cm),
-                    comprimento_cm = COALESCE(:comprimento_cm, comprimento_cm)
-                WHERE id = :id
-                """
-            ), {**fields, "id": mid})
-            if result.rowcount == 0:
-                return jsonify({"error": "not_found"}), 404
-        return jsonify({"id": mid}), 200
+            row = conn.execute(update_statement(frozenset(changes)), {**changes, "id": mid}).mappings().first()
+            if not row:
+                return ERR_NOT_FOUND
+        invalidate_cache(LIST_CACHE_KEY, maquete_cache_key(mid))
+        return jsonify(row), 200
     except IntegrityError as e:
-        print("[ERROR] update_maquete IntegrityError:", e)
+        app.logger.warning("update_maquete IntegrityError: %s", e)
         detail = "Uma maquete com este nome já existe"
         try:
             orig = getattr(e, 'orig', None)
@@ -427,86 +770,150 @@ def update_maquete(mid: int):
         except Exception:
             pass
         return jsonify({"error": "duplicate_nome", "detail": detail}), 409
+    except OperationalError as e:
+        app.logger.error("update_maquete (DB): %s", e)
+        return db_unavailable(str(e))
     except Exception as e:
-        print("[ERROR] update_maquete:", e)
+        app.logger.exception("update_maquete")
         return jsonify({"error": "update_error", "detail": str(e)}), 500
 
 # ===============================
 # API Imagens Secundárias
 # ===============================
+
+# SQL das imagens, também montado uma vez na importação
+SQL_LIST_IMAGES = text(
+    """
+    SELECT id, url, public_id, position, created_at
+    FROM maquete_images
+    WHERE maquete_id = :mid
+    ORDER BY COALESCE(position, 999999), id
+    """
+)
+# sem position explícita, usa a próxima posição livre no mesmo INSERT
+SQL_INSERT_IMAGE = text(
+    """
+    INSERT INTO maquete_images (maquete_id, url, public_id, position)
+    VALUES (:mid, :url, :public_id, COALESCE(
+        CAST(:position AS INTEGER),
+        (SELECT COALESCE(MAX(position), 0) + 1 FROM maquete_images WHERE maquete_id = :mid)
+    ))
+    RETURNING id, position
+    """
+)
+# várias imagens num único INSERT: as sem position recebem as próximas livres, na ordem enviada;
+# duplicadas (UNIQUE) são puladas sem desfazer as demais
+SQL_INSERT_IMAGES = text(
+    """
+    WITH base AS (
+        SELECT COALESCE(MAX(position), 0) AS last FROM maquete_images WHERE maquete_id = :mid
+    )
+    INSERT INTO maquete_images (maquete_id, url, public_id, position)
+    SELECT :mid, t.url, t.public_id, COALESCE(
+        t.position,
+        base.last + count(*) FILTER (WHERE t.position IS NULL) OVER (ORDER BY t.ord)
+    )
+    FROM unnest(CAST(:urls AS TEXT[]), CAST(:public_ids AS TEXT[]), CAST(:positions AS INTEGER[]))
+         WITH ORDINALITY AS t(url, public_id, position, ord), base
+    ORDER BY t.ord
+    ON CONFLICT DO NOTHING
+    RETURNING id, position, url, public_id
+    """
+)
+# limite de imagens por POST em lote
+IMAGES_BULK_MAX = 50
+SQL_DELETE_IMAGE = text("DELETE FROM maquete_images WHERE id = :iid AND maquete_id = :mid")
+
 @app.route('/api/maquetes/<int:mid>/images', methods=['GET'])
 @requires_auth
 def list_maquete_images(mid: int):
-    ok, err = ensure_db()
-    if not ok:
-        return jsonify({"error": "db_unavailable", "detail": err}), 503
     try:
-        with engine.begin() as conn:
-            rows = conn.execute(text(
-                """
-                SELECT id, url, public_id, position, created_at
-                FROM maquete_images
-                WHERE maquete_id = :mid
-                ORDER BY COALESCE(position, 999999), id
-                """
-            ), {"mid": mid}).mappings().all()
-        return jsonify([dict(r) for r in rows]), 200
+        with read_engine.connect() as conn:
+            rows = conn.execute(SQL_LIST_IMAGES, {"mid": mid}).mappings().all()
+        return jsonify(rows), 200
+    except OperationalError as e:
+        app.logger.error("list_maquete_images (DB): %s", e)
+        return db_unavailable(str(e))
     except Exception as e:
-        print("[ERROR] list_maquete_images:", e)
+        app.logger.exception("list_maquete_images")
         return jsonify({"error": "query_error", "detail": str(e)}), 500
 
 @app.route('/api/maquetes/<int:mid>/images', methods=['POST'])
 @requires_auth
 def create_maquete_image(mid: int):
-    ok, err = ensure_db()
-    if not ok:
-        return jsonify({"error": "db_unavailable", "detail": err}), 503
-    data = request.get_json(force=True) or {}
+    data = parse_body()
+    if data is None:
+        return ERR_INVALID_JSON
     try:
-        url = (data.get("url") or "").strip()
-        public_id = (data.get("public_id") or "").strip()
-        pos = data.get("position")
-        if not public_id and not url:
-            return jsonify({"error": "invalid_input", "detail": "public_id or url is required"}), 400
-        # Descobrir próxima posição se não fornecida
+        # {"images": [...]} cadastra várias de uma vez; senão o corpo é a própria imagem
+        bulk = "images" in data
+        items = data.get("images") if bulk else [data]
+        if not isinstance(items, list) or not items or len(items) > IMAGES_BULK_MAX:
+            return jsonify({"error": "invalid_input", "detail": f"images must be a list of 1 to {IMAGES_BULK_MAX} items"}), 400
+        urls, public_ids, positions = [], [], []
+        for item in items:
+            if not isinstance(item, dict):
+                return jsonify({"error": "invalid_input", "detail": "each image must be an object"}), 400
+            url = _clean_str(item.get("url"))
+            public_id = _clean_str(item.get("public_id"))
+            pos = item.get("position")
+            if not public_id and not url:
+                return jsonify({"error": "invalid_input", "detail": "public_id or url is required"}), 400
+            urls.append(url)
+            public_ids.append(public_id)
+            positions.append(int(pos) if pos is not None else None)
+
         with engine.begin() as conn:
-            if pos is None:
-                next_pos = conn.execute(text(
-                    "SELECT COALESCE(MAX(position), 0) + 1 FROM maquete_images WHERE maquete_id = :mid"
-                ), {"mid": mid}).scalar() or 1
-            else:
-                next_pos = int(pos)
-            new_id = conn.execute(text(
-                """
-                INSERT INTO maquete_images (maquete_id, url, public_id, position)
-                VALUES (:mid, :url, :public_id, :position)
-                RETURNING id
-                """
-            ), {"mid": mid, "url": url or None, "public_id": public_id or None, "position": next_pos}).scalar()
-        return jsonify({"id": int(new_id), "position": next_pos}), 201
+            if not bulk:
+                row = conn.execute(SQL_INSERT_IMAGE, {
+                    "mid": mid,
+                    "url": urls[0],
+                    "public_id": public_ids[0],
+                    "position": positions[0],
+                }).one()
+                return jsonify({"id": row.id, "position": row.position}), 201
+            rows = conn.execute(SQL_INSERT_IMAGES, {
+                "mid": mid,
+                "urls": urls,
+                "public_ids": public_ids,
+                "positions": positions,
+            }).all()
+        # casa cada linha inserida com o índice enviado (ids crescem na ordem do lote);
+        # o que sobrar foi pulado por conflito
+        pending = {}
+        for i, key in enumerate(zip(urls, public_ids)):
+            pending.setdefault(key, []).append(i)
+        created = []
+        for r in sorted(rows, key=lambda r: r.id):
+            created.append({"index": pending[(r.url, r.public_id)].pop(0), "id": r.id, "position": r.position})
+        skipped = sorted(i for idx in pending.values() for i in idx)
+        if not created:
+            return jsonify({"error": "duplicate_image", "detail": "Imagens já cadastradas para esta maquete", "skipped": skipped}), 409
+        return jsonify({"images": created, "skipped": skipped}), 201
     except IntegrityError as e:
-        print("[ERROR] create_maquete_image IntegrityError:", e)
+        app.logger.warning("create_maquete_image IntegrityError: %s", e)
         return jsonify({"error": "duplicate_image", "detail": "Imagem já cadastrada para esta maquete"}), 409
+    except OperationalError as e:
+        app.logger.error("create_maquete_image (DB): %s", e)
+        return db_unavailable(str(e))
     except Exception as e:
-        print("[ERROR] create_maquete_image:", e)
+        app.logger.exception("create_maquete_image")
         return jsonify({"error": "insert_error", "detail": str(e)}), 500
 
 @app.route('/api/maquetes/<int:mid>/images/<int:image_id>', methods=['DELETE'])
 @requires_auth
 def delete_maquete_image(mid: int, image_id: int):
-    ok, err = ensure_db()
-    if not ok:
-        return jsonify({"error": "db_unavailable", "detail": err}), 503
     try:
         with engine.begin() as conn:
-            result = conn.execute(text(
-                "DELETE FROM maquete_images WHERE id = :iid AND maquete_id = :mid"
-            ), {"iid": image_id, "mid": mid})
+            result = conn.execute(SQL_DELETE_IMAGE, {"iid": image_id, "mid": mid})
             if result.rowcount == 0:
-                return jsonify({"error": "not_found"}), 404
+                return ERR_NOT_FOUND
         return '', 204
+    except OperationalError as e:
+        app.logger.error("delete_maquete_image (DB): %s", e)
+        return db_unavailable(str(e))
     except Exception as e:
-        print("[ERROR] delete_maquete_image:", e)
+        app.logger.exception("delete_maquete_image")
         return jsonify({"error": "delete_error", "detail": str(e)}), 500
 
 # ===============================
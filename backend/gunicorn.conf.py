@@ -0,0 +1,18 @@
+# ===============================
+# Gunicorn - servidor de produção
+# ===============================
+# Carregado automaticamente pelo gunicorn a partir do diretório de trabalho.
+# Workers gthread: vários processos, cada um com threads para as requisições
+# que ficam esperando o banco.
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+worker_class = "gthread"
+workers = int(os.getenv('WEB_CONCURRENCY') or multiprocessing.cpu_count() * 2 + 1)
+# o app decide o tipo de cache pelo número de workers (herdado no fork)
+os.environ['WEB_CONCURRENCY'] = str(workers)
+threads = int(os.getenv('GUNICORN_THREADS') or 8)
+timeout = 30
+accesslog = "-"
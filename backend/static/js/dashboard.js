@@ -10,6 +10,41 @@ async function fetchJSON(url, options = {}) {
   if (!res.ok) throw new Error(`HTTP ${res.status}`);
   return res.status === 204 ? null : res.json();
 }
+// carrega todas as maquetes seguindo a paginação do servidor (cabeçalho X-Next-After)
+async function fetchAllMaquetes() {
+  const all = [];
+  let url = '/api/maquetes';
+  while (url) {
+    const res = await fetch(url, { headers: { 'Content-Type': 'application/json' } });
+    if (!res.ok) throw new Error(`HTTP ${res.status}`);
+    all.push(...await res.json());
+    const next = res.headers.get('X-Next-After');
+    url = next ? `/api/maquetes?after=${encodeURIComponent(next)}` : null;
+  }
+  return all;
+}
+// vincula imagens secundárias em lotes de até IMAGES_BULK_MAX (limite do servidor);
+// devolve quantas não foram vinculadas (duplicadas ou lote com erro)
+const IMAGES_BULK_MAX = 50;
+async function linkSecundarias(mid, images) {
+  let failed = 0;
+  for (let i = 0; i < images.length; i += IMAGES_BULK_MAX) {
+    const batch = images.slice(i, i + IMAGES_BULK_MAX);
+    try {
+      const res = await fetchJSON(`/api/maquetes/${mid}/images`, {
+        method: 'POST',
+        body: JSON.stringify({
+          images: batch.map(img => ({ public_id: img.public_id || '', url: img.url || '' })),
+        }),
+      });
+      failed += res?.skipped?.length || 0;
+    } catch (err) {
+      console.warn('Falha ao vincular imagens secundárias:', err);
+      failed += batch.length;
+    }
+  }
+  return failed;
+}
 // UI: toast simples de sucesso/erro (centralizado)
 function showToast(message, type = 'success') {
   try {
@@ -123,7 +158,7 @@ async function loadMaquetes() {
   if (body) body.innerHTML = '<tr><td colspan="6" class="muted">Carregando…</td></tr>';
   if (cards) cards.innerHTML = '<div class="muted">Carregando…</div>';
   try {
-    const maquetes = await fetchJSON('/api/maquetes');
+    const maquetes = await fetchAllMaquetes();
 
     // Tabela
     if (body) {
@@ -248,19 +283,20 @@ async function handleCreate(ev) {
     if (!hasUploads && cadastroSecundarias.length > 0) {
       alert('Cloudinary não configurado: as imagens secundárias selecionadas não serão salvas.');
     }
+    // falha ao vincular não desfaz o cadastro, mas é avisada no toast
+    let naoVinculadas = 0;
     if (newId && hasUploads) {
       const toLink = cadastroSecundarias.filter(img => img.public_id || img.url);
-      await Promise.allSettled(toLink.map(img =>
-        fetchJSON(`/api/maquetes/${newId}/images`, {
-          method: 'POST',
-          body: JSON.stringify({ public_id: img.public_id || '', url: img.url || '' }),
-        })
-      ));
+      naoVinculadas = await linkSecundarias(newId, toLink);
     }
     form.reset();
     resetCadastroSecundarias();
     await loadMaquetes();
-    showToast('Maquete Cadastrada', 'success');
+    if (naoVinculadas) {
+      showToast(`Maquete cadastrada, mas ${naoVinculadas} imagem(ns) secundária(s) não foram vinculadas`, 'error');
+    } else {
+      showToast('Maquete Cadastrada', 'success');
+    }
   } catch (err) {
     alert('Erro ao criar: ' + err.message);
   } finally {
@@ -412,7 +448,7 @@ function initNavigation() {
 async function loadInfoKpis() {
   const set = (id, v) => { const el = document.getElementById(id); if (el) el.textContent = v; };
   try {
-    const maquetes = await fetchJSON('/api/maquetes');
+    const maquetes = await fetchAllMaquetes();
     const total = maquetes?.length ?? 0;
     const comImagem = (maquetes || []).filter(m => !!m.imagem_principal_url).length;
     const semImagem = total - comImagem;